@@ -26,9 +26,8 @@ from jax import lax
 from jax.interpreters import ad
 from jax.interpreters import mlir
 from jax.experimental.sparse._base import JAXSparse
-from jax.experimental.sparse.util import _coo_extract, _safe_asarray, CuSparseEfficiencyWarning
+from jax.experimental.sparse.util import _coo_extract, _coo_to_csr_indptr, _safe_asarray, CuSparseEfficiencyWarning
 from jax import tree_util
-from jax._src.lax.lax import _const
 from jax._src.lib.mlir.dialects import mhlo
 from jax._src.lib import gpu_sparse
 from jax._src.lib import sparse_apis
@@ -39,6 +38,11 @@ import jax.numpy as jnp
 Dtype = Any
 Shape = Tuple[int, ...]
 
+# Index dtypes accepted by the cusparse/hipsparse kernels. Narrower index dtypes
+# (e.g. int16, which halves index memory traffic for small matrices) are handled
+# by the default implementation.
+_gpu_index_dtypes = [np.int32, np.int64]
+
 class COOInfo(NamedTuple):
   shape: Shape
   rows_sorted: bool = False
@@ -59,10 +63,8 @@ class COO(JAXSparse):
   shape: Tuple[int, int]
   nse = property(lambda self: self.data.size)
   dtype = property(lambda self: self.data.dtype)
-  _info = property(lambda self: COOInfo(
-      shape=self.shape, rows_sorted=self._rows_sorted,
-      cols_sorted=self._cols_sorted))
-  _bufs = property(lambda self: (self.data, self.row, self.col))
+  _info: COOInfo
+  _bufs: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray]
   _rows_sorted: bool
   _cols_sorted: bool
 
@@ -71,6 +73,10 @@ class COO(JAXSparse):
     self._rows_sorted = rows_sorted
     self._cols_sorted = cols_sorted
     super().__init__(args, shape=shape)
+    # These are accessed by every primitive call, so build them only once.
+    self._info = COOInfo(shape=self.shape, rows_sorted=rows_sorted,
+                         cols_sorted=cols_sorted)
+    self._bufs = (self.data, self.row, self.col)
 
   @classmethod
   def fromdense(cls, mat, *, nse=None, index_dtype=np.int32):
@@ -111,15 +117,25 @@ class COO(JAXSparse):
       # if k is out of range, return an empty matrix.
       return cls._empty((N, M), dtype=dtype, index_dtype=index_dtype)
 
-    k = jnp.asarray(k)
     data = jnp.ones(diag_size, dtype=dtype)
-    idx = jnp.arange(diag_size, dtype=index_dtype)
-    zero = _const(idx, 0)
-    k = _const(idx, k)
-    row = lax.sub(idx, lax.cond(k >= 0, lambda: zero, lambda: k))
-    col = lax.add(idx, lax.cond(k <= 0, lambda: zero, lambda: k))
+    idx = lax.iota(index_dtype, diag_size)
+    row = idx + max(-k, 0)
+    col = idx + max(k, 0)
     return cls((data, row, col), shape=(N, M), rows_sorted=True, cols_sorted=True)
 
+  def _as_csr(self):
+    """Return a CSR representation of the matrix.
+
+    The ``indptr`` is computed from the sorted row indices; converting once and
+    reusing the result amortizes this over repeated products. Note that padded
+    matrices from the cuSPARSE ``coo_fromdense`` lowering are flagged as having
+    sorted rows without being sorted, and are not converted correctly.
+    """
+    from jax.experimental.sparse.csr import CSR
+    mat = self._sort_indices()
+    indptr = _coo_to_csr_indptr(mat.row, mat.shape[0])
+    return CSR((mat.data, mat.col, indptr), shape=mat.shape)
+
   def todense(self):
     return coo_todense(self)
 
@@ -136,12 +152,14 @@ class COO(JAXSparse):
     if isinstance(other, JAXSparse):
       raise NotImplementedError("matmul between two sparse objects.")
     other = jnp.asarray(other)
-    data, other = _promote_dtypes(self.data, other)
-    self_promoted = COO((data, self.row, self.col), **self._info._asdict())
+    if self.dtype == other.dtype:
+      data = self.data
+    else:
+      data, other = _promote_dtypes(self.data, other)
     if other.ndim == 1:
-      return coo_matvec(self_promoted, other)
+      return _coo_matvec(data, self.row, self.col, other, spinfo=self._info)
     elif other.ndim == 2:
-      return coo_matmat(self_promoted, other)
+      return _coo_matmat(data, self.row, self.col, other, spinfo=self._info)
     else:
       raise NotImplementedError(f"matmul with object of shape {other.shape}")
 
@@ -176,7 +194,10 @@ def _coo_todense(data, row, col, *, spinfo):
 
 @coo_todense_p.def_impl
 def _coo_todense_impl(data, row, col, *, spinfo):
-  return jnp.zeros(spinfo.shape, data.dtype).at[row, col].add(data)
+  # rows_sorted alone does not order columns within a row, so the (row, col)
+  # pairs are only known to be sorted when both flags are set.
+  return jnp.zeros(spinfo.shape, data.dtype).at[row, col].add(
+      data, indices_are_sorted=spinfo.rows_sorted and spinfo.cols_sorted)
 
 @coo_todense_p.def_abstract_eval
 def _coo_todense_abstract_eval(data, row, col, *, spinfo):
@@ -192,6 +213,10 @@ def _coo_todense_gpu_lowering(coo_todense_mhlo, ctx, data, row, col, *, spinfo):
     warnings.warn(f"coo_todense cusparse/hipsparse lowering not available for dtype={dtype}. "
                   "Falling back to default implementation.", CuSparseEfficiencyWarning)
     return _coo_todense_lowering(ctx, data, row, col, spinfo=spinfo)
+  if row_aval.dtype not in _gpu_index_dtypes:
+    warnings.warn(f"coo_todense cusparse/hipsparse lowering not available for index_dtype={row_aval.dtype}. "
+                  "Falling back to default implementation.", CuSparseEfficiencyWarning)
+    return _coo_todense_lowering(ctx, data, row, col, spinfo=spinfo)
 
   if spinfo.rows_sorted:
     shape = spinfo.shape
@@ -266,19 +291,23 @@ def coo_fromdense(mat, *, nse=None, index_dtype=jnp.int32):
   Returns:
     mat_coo : COO representation of the matrix.
   """
+  exact_nse = nse is None
   if nse is None:
     nse = (mat != 0).sum()
   nse = core.concrete_or_error(operator.index, nse, "coo_fromdense nse argument")
-  return COO(_coo_fromdense(mat, nse=nse, index_dtype=index_dtype),
+  return COO(_coo_fromdense(mat, nse=nse, index_dtype=index_dtype,
+                            exact_nse=exact_nse),
              shape=mat.shape, rows_sorted=True)
 
-def _coo_fromdense(mat, *, nse, index_dtype=jnp.int32):
+def _coo_fromdense(mat, *, nse, index_dtype=jnp.int32, exact_nse=False):
   """Create COO-format sparse matrix from a dense matrix.
 
   Args:
     mat : array to be converted to COO.
     nse : number of specified entries in ``mat``
     index_dtype : dtype of sparse indices
+    exact_nse : if True, ``nse`` is known to equal the number of nonzero
+      entries in ``mat``, so that the output requires no padding.
 
   Returns:
     data : array of shape ``(nse,)`` and dtype ``mat.dtype``
@@ -287,23 +316,32 @@ def _coo_fromdense(mat, *, nse, index_dtype=jnp.int32):
   """
   mat = jnp.asarray(mat)
   nse = core.concrete_or_error(operator.index, nse, "nse argument of coo_fromdense()")
-  return coo_fromdense_p.bind(mat, nse=nse, index_dtype=index_dtype)
+  return coo_fromdense_p.bind(mat, nse=nse, index_dtype=index_dtype,
+                              exact_nse=exact_nse)
 
 @coo_fromdense_p.def_impl
-def _coo_fromdense_impl(mat, *, nse, index_dtype):
+def _coo_fromdense_impl(mat, *, nse, index_dtype, exact_nse):
   mat = jnp.asarray(mat)
   assert mat.ndim == 2
 
-  row, col = jnp.nonzero(mat, size=nse)
+  # Compute the nonzero mask once, and use it both to locate the nonzero
+  # entries and to count them.
+  mask = mat != 0
+  # Padded entries are placed at the final position of the matrix, so that the
+  # indices remain sorted.
+  fill_value = None if exact_nse else (max(mat.shape[0] - 1, 0), max(mat.shape[1] - 1, 0))
+  row, col = jnp.nonzero(mask, size=nse, fill_value=fill_value)
   data = mat[row, col]
 
-  true_nonzeros = jnp.arange(nse) < (mat != 0).sum()
-  data = jnp.where(true_nonzeros, data, 0)
+  if not exact_nse:
+    true_nse = mask.sum()
+    true_nonzeros = lax.iota(true_nse.dtype, nse) < true_nse
+    data = lax.select(true_nonzeros, data, lax.full_like(data, 0))
 
   return data, row.astype(index_dtype), col.astype(index_dtype)
 
 @coo_fromdense_p.def_abstract_eval
-def _coo_fromdense_abstract_eval(mat, *, nse, index_dtype):
+def _coo_fromdense_abstract_eval(mat, *, nse, index_dtype, exact_nse):
   data = core.ShapedArray((nse,), mat.dtype)
   row = col = core.ShapedArray((nse,), index_dtype)
   return data, row, col
@@ -312,12 +350,21 @@ _coo_fromdense_lowering = mlir.lower_fun(
     _coo_fromdense_impl, multiple_results=True)
 
 def _coo_fromdense_gpu_lowering(coo_fromdense_mhlo, ctx, mat, *, nse,
-                                index_dtype):
+                                index_dtype, exact_nse):
   dtype = ctx.avals_in[0].dtype
   if not (np.issubdtype(dtype, np.floating) or np.issubdtype(dtype, np.complexfloating)):
     warnings.warn(f"coo_fromdense cusparse/hipsparse lowering not available for dtype={dtype}. "
                   "Falling back to default implementation.", CuSparseEfficiencyWarning)
-    return _coo_fromdense_lowering(ctx, mat, nse=nse, index_dtype=index_dtype)
+    return _coo_fromdense_lowering(ctx, mat, nse=nse, index_dtype=index_dtype,
+                                   exact_nse=exact_nse)
+  if np.dtype(index_dtype) not in _gpu_index_dtypes:
+    warnings.warn(f"coo_fromdense cusparse/hipsparse lowering not available for index_dtype={np.dtype(index_dtype)}. "
+                  "Falling back to default implementation.", CuSparseEfficiencyWarning)
+    return _coo_fromdense_lowering(ctx, mat, nse=nse, index_dtype=index_dtype,
+                                   exact_nse=exact_nse)
+  # Unlike the default implementation, the cuSPARSE conversion does not move
+  # padded entries to the final position when nse exceeds the number of
+  # nonzeros, so the output rows are only guaranteed sorted for exact nse.
   data, row, col = coo_fromdense_mhlo(
       mat, nnz=nse,
       data_dtype=dtype,
@@ -326,11 +373,12 @@ def _coo_fromdense_gpu_lowering(coo_fromdense_mhlo, ctx, mat, *, nse,
   return [data, row, col]
 
 
-def _coo_fromdense_jvp(primals, tangents, *, nse, index_dtype):
+def _coo_fromdense_jvp(primals, tangents, *, nse, index_dtype, exact_nse):
   M, = primals
   Mdot, = tangents
 
-  primals_out = _coo_fromdense(M, nse=nse, index_dtype=index_dtype)
+  primals_out = _coo_fromdense(M, nse=nse, index_dtype=index_dtype,
+                               exact_nse=exact_nse)
   data, row, col = primals_out
 
   if type(Mdot) is ad.Zero:
@@ -342,7 +390,7 @@ def _coo_fromdense_jvp(primals, tangents, *, nse, index_dtype):
 
   return primals_out, tangents_out
 
-def _coo_fromdense_transpose(ct, M, *, nse, index_dtype):
+def _coo_fromdense_transpose(ct, M, *, nse, index_dtype, exact_nse):
   data, row, col = ct
   assert len(data) == nse
   assert row.dtype == col.dtype == index_dtype
@@ -421,7 +469,9 @@ def _coo_matvec_impl(data, row, col, v, *, spinfo, transpose):
     row, col = col, row
   out_shape = spinfo.shape[1] if transpose else spinfo.shape[0]
   dv = data * v[col]
-  return jnp.zeros(out_shape, dv.dtype).at[row].add(dv)
+  indices_are_sorted = spinfo.cols_sorted if transpose else spinfo.rows_sorted
+  return jnp.zeros(out_shape, dv.dtype).at[row].add(
+      dv, indices_are_sorted=indices_are_sorted)
 
 @coo_matvec_p.def_abstract_eval
 def _coo_matvec_abstract_eval(data, row, col, v, *, spinfo, transpose):
@@ -446,6 +496,11 @@ def _coo_matvec_gpu_lowering(coo_matvec_mhlo, ctx, data, row, col, v, *, spinfo,
                   "Falling back to default implementation.", CuSparseEfficiencyWarning)
     return _coo_matvec_lowering(ctx, data, row, col, v, spinfo=spinfo,
                                 transpose=transpose)
+  if row_aval.dtype not in _gpu_index_dtypes:
+    warnings.warn(f"coo_matvec cusparse/hipsparse lowering not available for index_dtype={row_aval.dtype}. "
+                  "Falling back to default implementation.", CuSparseEfficiencyWarning)
+    return _coo_matvec_lowering(ctx, data, row, col, v, spinfo=spinfo,
+                                transpose=transpose)
 
   if spinfo.rows_sorted:
     shape = spinfo.shape
@@ -551,7 +606,9 @@ def _coo_matmat_impl(data, row, col, B, *, spinfo, transpose):
     row, col = col, row
   out_shape = spinfo.shape[1] if transpose else spinfo.shape[0]
   dB = data[:, None] * B[col]
-  return jnp.zeros((out_shape, B.shape[1]), dB.dtype).at[row].add(dB)
+  indices_are_sorted = spinfo.cols_sorted if transpose else spinfo.rows_sorted
+  return jnp.zeros((out_shape, B.shape[1]), dB.dtype).at[row].add(
+      dB, indices_are_sorted=indices_are_sorted)
 
 @coo_matmat_p.def_abstract_eval
 def _coo_matmat_abstract_eval(data, row, col, B, *, spinfo, transpose):
@@ -574,6 +631,11 @@ def _coo_matmat_gpu_lowering(coo_matmat_mhlo, ctx, data, row, col, B, *, spinfo,
                   "Falling back to default implementation.", CuSparseEfficiencyWarning)
     return _coo_matmat_lowering(ctx, data, row, col, B, spinfo=spinfo,
                                 transpose=transpose)
+  if row_aval.dtype not in _gpu_index_dtypes:
+    warnings.warn(f"coo_matmat cusparse/hipsparse lowering not available for index_dtype={row_aval.dtype}. "
+                  "Falling back to default implementation.", CuSparseEfficiencyWarning)
+    return _coo_matmat_lowering(ctx, data, row, col, B, spinfo=spinfo,
+                                transpose=transpose)
   if spinfo.rows_sorted:
     shape = spinfo.shape
   elif spinfo.cols_sorted:
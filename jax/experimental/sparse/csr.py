@@ -26,7 +26,7 @@ from jax.interpreters import ad
 from jax.interpreters import mlir
 from jax.experimental.sparse._base import JAXSparse
 from jax.experimental.sparse.coo import _coo_matmat, _coo_matvec, _coo_todense, COOInfo
-from jax.experimental.sparse.util import _csr_to_coo, _csr_extract, _safe_asarray, CuSparseEfficiencyWarning
+from jax.experimental.sparse.util import _coo_to_csr_indptr, _csr_to_coo, _csr_extract, _safe_asarray, CuSparseEfficiencyWarning
 from jax import lax
 from jax import tree_util
 from jax._src.lax.lax import _const
@@ -92,8 +92,8 @@ class CSR(JAXSparse):
     indices = col.astype(index_dtype)
     # TODO(jakevdp): this can be done more efficiently.
     row = lax.sub(idx, lax.cond(k >= 0, lambda: zero, lambda: k))
-    indptr = jnp.zeros(N + 1, dtype=index_dtype).at[1:].set(
-        jnp.cumsum(jnp.bincount(row, length=N).astype(index_dtype)))
+    # Here nse <= N, so indptr fits in index_dtype.
+    indptr = _coo_to_csr_indptr(row, N).astype(index_dtype)
     return cls((data, indices, indptr), shape=(N, M))
 
   def todense(self):
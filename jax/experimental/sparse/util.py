@@ -38,6 +38,13 @@ def _csr_to_coo(indices, indptr):
   """Given CSR (indices, indptr) return COO (row, col)"""
   return jnp.cumsum(jnp.zeros_like(indices).at[indptr].add(1)) - 1, indices
 
+def _coo_to_csr_indptr(row, nrows):
+  """Given sorted COO row indices, return the CSR indptr"""
+  # indptr counts up to nse, which may overflow a narrow index dtype.
+  dtype = jnp.promote_types(row.dtype, np.int32)
+  counts = jnp.bincount(row, length=nrows)
+  return jnp.concatenate([jnp.zeros(1, dtype), jnp.cumsum(counts, dtype=dtype)])
+
 def _csr_extract(indices, indptr, mat):
   """Extract values of dense matrix mat at given CSR indices."""
   return _coo_extract(*_csr_to_coo(indices, indptr), mat)
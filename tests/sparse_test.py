@@ -445,6 +445,46 @@ class cuSparseTest(jtu.JaxTestCase):
     mat_resorted = mat_unsorted._sort_indices()
     self.assertArraysEqual(mat.todense(), mat_resorted.todense())
 
+  def test_coo_as_csr(self):
+    rng = self.rng()
+    sprng = rand_sparse(rng)
+
+    M = sprng((5, 6), np.float32)
+    mat = sparse.COO.fromdense(M)
+    perm = rng.permutation(mat.nse)
+    mat_unsorted = sparse.COO((mat.data[perm], mat.row[perm], mat.col[perm]), shape=mat.shape)
+    mat_padded = sparse.COO.fromdense(M, nse=M.size)
+    for m in [mat, mat_unsorted, mat_padded]:
+      mat_csr = m._as_csr()
+      self.assertIsInstance(mat_csr, sparse.CSR)
+      self.assertArraysEqual(mat_csr.todense(), M)
+
+    # indptr counts up to nse, which here does not fit in the index dtype.
+    mat_int16 = sparse.COO.fromdense(jnp.ones((200, 200), np.float32), index_dtype=np.int16)
+    self.assertEqual(int(mat_int16._as_csr().indptr[-1]), 40000)
+
+  def test_coo_fromdense_padding_sorted(self):
+    mat = jnp.array([[0, 1, 0], [2, 0, 3]], dtype=np.float32)
+    mat_coo = sparse.COO.fromdense(mat, nse=5)
+    self.assertTrue(mat_coo._rows_sorted)
+    self.assertArraysEqual(mat_coo.data, np.array([1, 2, 3, 0, 0], dtype=np.float32))
+    self.assertArraysEqual(mat_coo.row, np.array([0, 1, 1, 1, 1], dtype=np.int32))
+    self.assertArraysEqual(mat_coo.col, np.array([1, 0, 2, 2, 2], dtype=np.int32))
+    self.assertArraysEqual(mat_coo.todense(), mat)
+
+  def test_coo_narrow_index_dtype(self):
+    rng = rand_sparse(self.rng())
+    M = rng((5, 6), np.float32)
+    v = self.rng().randn(6).astype(np.float32)
+    B = self.rng().randn(6, 3).astype(np.float32)
+
+    mat = sparse.COO.fromdense(M, index_dtype=np.int16)
+    self.assertEqual(mat.row.dtype, np.int16)
+    self.assertEqual(mat.col.dtype, np.int16)
+    self.assertArraysEqual(mat.todense(), M)
+    self.assertAllClose(mat @ v, M @ v)
+    self.assertAllClose(mat @ B, M @ B)
+
   @unittest.skipIf(not GPU_LOWERING_ENABLED, "test requires cusparse/hipsparse")
   @unittest.skipIf(jtu.device_under_test() != "gpu", "test requires GPU")
   @jtu.skip_on_devices("rocm")  # TODO(rocm): see SWDEV-328107
@@ -509,6 +549,36 @@ class cuSparseTest(jtu.JaxTestCase):
     self.assertArraysEqual(matmat_expected, matmat_unsorted)
     self.assertArraysEqual(matmat_expected, matmat_unsorted_fallback)
 
+  @unittest.skipIf(not GPU_LOWERING_ENABLED, "test requires cusparse/hipsparse")
+  @unittest.skipIf(jtu.device_under_test() != "gpu", "test requires GPU")
+  @jtu.skip_on_devices("rocm")  # TODO(rocm): see SWDEV-328107
+  def test_coo_narrow_index_dtype_gpu_lowerings(self):
+    dtype = jnp.float32
+    index_dtype = jnp.int16
+
+    mat = jnp.arange(12, dtype=dtype).reshape(4, 3)
+    nse = int((mat != 0).sum())
+    rhs_vec = jnp.arange(3, dtype=dtype)
+    rhs_mat = jnp.arange(6, dtype=dtype).reshape(3, 2)
+
+    fromdense = jit(partial(sparse.coo_fromdense, nse=nse, index_dtype=index_dtype))
+    with self.assertWarnsRegex(sparse.CuSparseEfficiencyWarning, "index_dtype=int16"):
+      mat_coo = fromdense(mat)
+    self.assertEqual(mat_coo.row.dtype, index_dtype)
+    self.assertEqual(mat_coo.col.dtype, index_dtype)
+
+    with self.assertWarnsRegex(sparse.CuSparseEfficiencyWarning, "index_dtype=int16"):
+      dense = jit(sparse.coo_todense)(mat_coo)
+    self.assertArraysEqual(mat, dense)
+
+    with self.assertWarnsRegex(sparse.CuSparseEfficiencyWarning, "index_dtype=int16"):
+      matvec = jit(sparse.coo_matvec)(mat_coo, rhs_vec)
+    self.assertAllClose(mat @ rhs_vec, matvec)
+
+    with self.assertWarnsRegex(sparse.CuSparseEfficiencyWarning, "index_dtype=int16"):
+      matmat = jit(sparse.coo_matmat)(mat_coo, rhs_mat)
+    self.assertAllClose(mat @ rhs_mat, matmat)
+
   @unittest.skipIf(jtu.device_under_test() != "gpu", "test requires GPU")
   def test_gpu_translation_rule(self):
     version = xla_bridge.get_backend().platform_version